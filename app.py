@@ -1,12 +1,21 @@
 import streamlit as st
 from utils.evaluator import ContentEvaluator
+from utils.store import EvaluationStore
 from utils.data_model import (
     MARKETING_COPY_CRITERIA,
     BILINGUAL_COMPLIANCE_CRITERIA,
+    CRITERIA_WEIGHTS,
     CriterionScore,
-    get_decision
+    get_decision,
+    weighted_average
 )
-import json
+import csv
+import io
+import math
+import numpy as np
+import secrets
+import threading
+import time
 from datetime import datetime
 
 # Page config
@@ -23,9 +32,52 @@ def get_evaluator():
 
 evaluator = get_evaluator()
 
-# Initialize session state for storing evaluations
-if 'evaluations' not in st.session_state:
-    st.session_state.evaluations = []
+# Evaluation history is persisted to SQLite and survives page reloads
+@st.cache_resource
+def get_store():
+    return EvaluationStore()
+
+store = get_store()
+
+# Each browser session's history is scoped by a session id kept in the URL,
+# so it survives reloads without being visible to other sessions
+if 'session' not in st.query_params:
+    st.query_params["session"] = secrets.token_hex(16)
+session_id = st.query_params["session"]
+
+# Cache Claude's scores for identical requests, keyed by
+# (content, use_case, context, model) so switching models invalidates it.
+# Kept as a plain dict so the streaming UI stays outside the cache.
+SCORE_CACHE_TTL = 3600  # seconds
+
+@st.cache_resource
+def get_score_cache():
+    return {"lock": threading.Lock(), "entries": {}}
+
+score_cache = get_score_cache()
+
+def get_cached_scores(cache_key):
+    with score_cache["lock"]:
+        entry = score_cache["entries"].get(cache_key)
+    if entry and time.monotonic() - entry[0] < SCORE_CACHE_TTL:
+        return entry[1]
+    return None
+
+def set_cached_scores(cache_key, ai_scores):
+    now = time.monotonic()
+    with score_cache["lock"]:
+        # Drop expired entries so the cache doesn't grow without bound
+        entries = score_cache["entries"]
+        for key in [k for k, (cached_at, _) in entries.items() if now - cached_at >= SCORE_CACHE_TTL]:
+            del entries[key]
+        entries[cache_key] = (now, ai_scores)
+
+# Number of evaluations rendered per page in the history tab
+HISTORY_PAGE_SIZE = 20
+
+# Initialize session state for the evaluation shown in the Evaluate tab
+if 'last_evaluation' not in st.session_state:
+    st.session_state.last_evaluation = None
 
 # Title and description
 st.title("🎯 AI Content Quality Evaluator")
@@ -34,6 +86,11 @@ Evaluate multilingual marketing content and bilingual compliance using AI-powere
 Built for Amazon's North America Languages Experience team.
 """)
 
+# Evaluations are written in the background, so report any that failed to save
+failed_writes = store.take_failed_writes(session_id)
+if failed_writes:
+    st.error(f"{failed_writes} evaluation(s) could not be saved to history. See the server log for details.")
+
 # Create tabs
 tab1, tab2, tab3 = st.tabs(["📝 Evaluate Content", "📊 Review History", "📚 Learn About Evals"])
 
@@ -75,25 +132,58 @@ with tab1:
             st.error("Please enter content to evaluate")
         else:
             with st.spinner("Evaluating with Claude..."):
+                criteria = MARKETING_COPY_CRITERIA if use_case == "marketing_copy" else BILINGUAL_COMPLIANCE_CRITERIA
+
+                # Show the criteria skeleton right away, fill in scores as they stream in
+                progress = st.empty()
+                with progress.container():
+                    placeholders = {}
+                    for criterion_key, criterion_info in criteria.items():
+                        placeholders[criterion_key] = st.empty()
+                        placeholders[criterion_key].write(f"⏳ **{criterion_info['name']}**")
+
                 try:
+                    def show_score(criterion_key, score_obj):
+                        placeholders[criterion_key].write(
+                            f"✅ **{criteria[criterion_key]['name']}**: {score_obj.score}/5.0"
+                        )
+
+                    # Reuse cached scores for identical input, otherwise stream them
+                    cache_key = (content, use_case, context, evaluator.model)
+                    ai_scores = get_cached_scores(cache_key)
+                    if ai_scores is None:
+                        ai_scores = {}
+                        for criterion_key, score_obj in evaluator.evaluate_content_stream(
+                            content=content,
+                            use_case=use_case,
+                            context=context
+                        ):
+                            ai_scores[criterion_key] = score_obj
+                            show_score(criterion_key, score_obj)
+                        set_cached_scores(cache_key, ai_scores)
+
                     # Get evaluation
-                    evaluation = evaluator.evaluate_content(
+                    evaluation = evaluator.build_evaluation(
                         content=content,
                         use_case=use_case,
-                        context=context
+                        context=context,
+                        ai_scores=ai_scores
                     )
-                    
-                    # Store in session state
-                    st.session_state.evaluations.append(evaluation)
+
+                    # Persist, and keep it in session state for display
+                    store.save(evaluation, session_id)
+                    st.session_state.last_evaluation = evaluation
                     st.session_state.show_last_eval = True
                     
                 except Exception as e:
                     st.error(f"Error during evaluation: {str(e)}")
                     st.session_state.show_last_eval = False
+
+                progress.empty()
     
     # Display last evaluation if it exists
-    if st.session_state.get('show_last_eval') and len(st.session_state.evaluations) > 0:
-        evaluation = st.session_state.evaluations[-1]
+    if st.session_state.get('show_last_eval') and st.session_state.last_evaluation is not None:
+        evaluation = st.session_state.last_evaluation
         
         # Display results
         st.success("✅ Evaluation Complete!")
@@ -166,9 +256,11 @@ with tab1:
                 
                 if submit_human:
                     # Calculate human overall score
-                    total_score = sum(human_scores[k] * criteria[k]['weight'] for k in human_scores)
-                    total_weight = sum(criteria[k]['weight'] for k in criteria)
-                    human_overall = round(total_score / total_weight, 2)
+                    keys, weights = CRITERIA_WEIGHTS[evaluation.use_case]
+                    human_overall = weighted_average(
+                        np.fromiter((human_scores[k] for k in keys), dtype=np.float64, count=len(keys)),
+                        weights
+                    )
                     
                     # Determine human decision
                     human_decision = get_decision(human_overall)
@@ -181,45 +273,91 @@ with tab1:
                     evaluation.human_overall_score = human_overall
                     evaluation.human_decision = human_decision
                     evaluation.human_feedback = human_feedback
+                    store.save(evaluation, session_id)
                     
                     # Force rerun to show updated metrics
                     st.balloons()
                     st.rerun()
 
+    # Bulk evaluation from CSV
+    st.divider()
+    st.subheader("Bulk CSV Evaluation")
+    st.write("Upload a CSV with a `content` column and an optional `context` column. Rows are evaluated in parallel using the use case selected above.")
+    
+    bulk_file = st.file_uploader("Bulk CSV", type="csv")
+    
+    if bulk_file is not None and st.button("🚀 Evaluate All"):
+        rows = list(csv.DictReader(io.StringIO(bulk_file.getvalue().decode("utf-8-sig"))))
+        # Keep CSV data row numbers (1-based, header excluded) to report failed rows
+        row_numbers, items = [], []
+        for row_number, row in enumerate(rows, start=1):
+            if row.get("content"):
+                row_numbers.append(row_number)
+                items.append((row["content"], use_case, row.get("context") or ""))
+        
+        if not items:
+            st.error("No rows with a `content` column found in the CSV")
+        else:
+            with st.spinner(f"Evaluating {len(items)} items with Claude..."):
+                try:
+                    results = evaluator.evaluate_many(items)
+                except Exception as e:
+                    st.error(f"Error during bulk evaluation: {str(e)}")
+                    results = []
+            
+            failures = []
+            for row_number, result in zip(row_numbers, results):
+                if isinstance(result, Exception):
+                    failures.append((row_number, result))
+                else:
+                    store.save(result, session_id)
+            
+            succeeded = len(results) - len(failures)
+            if succeeded:
+                st.success(f"✅ Evaluated {succeeded} items. See the Review History tab for results.")
+            for row_number, error in failures:
+                st.error(f"Row {row_number} failed: {str(error)}")
+
 # TAB 2: Review History
 with tab2:
     st.header("Evaluation History")
     
-    if not st.session_state.evaluations:
+    total_evals = store.count(session_id)
+    
+    if not total_evals:
         st.info("No evaluations yet. Go to 'Evaluate Content' tab to create your first evaluation.")
     else:
-        st.write(f"**Total Evaluations:** {len(st.session_state.evaluations)}")
+        st.write(f"**Total Evaluations:** {total_evals}")
         
         # Summary stats
         col1, col2, col3 = st.columns(3)
         
-        auto_pass = sum(1 for e in st.session_state.evaluations if e.ai_decision == "auto_pass")
-        auto_fail = sum(1 for e in st.session_state.evaluations if e.ai_decision == "auto_fail")
-        human_review = sum(1 for e in st.session_state.evaluations if e.ai_decision == "human_review")
+        decision_counts = store.decision_counts(session_id)
         
-        col1.metric("Auto Pass", auto_pass)
-        col2.metric("Auto Fail", auto_fail)
-        col3.metric("Human Review Needed", human_review)
+        col1.metric("Auto Pass", decision_counts.get("auto_pass", 0))
+        col2.metric("Auto Fail", decision_counts.get("auto_fail", 0))
+        col3.metric("Human Review Needed", decision_counts.get("human_review", 0))
         
         # Average scores
-        avg_ai_score = sum(e.ai_overall_score for e in st.session_state.evaluations) / len(st.session_state.evaluations)
+        avg_ai_score = store.average_score(session_id)
         st.metric("Average AI Score", f"{avg_ai_score:.2f}/5.0")
         
         # Show evaluations
         st.divider()
         
-        for idx, eval_obj in enumerate(reversed(st.session_state.evaluations)):
-            with st.expander(f"Evaluation #{len(st.session_state.evaluations) - idx} - {eval_obj.use_case.replace('_', ' ').title()} - Score: {eval_obj.ai_overall_score}/5.0"):
-                st.write(f"**Timestamp:** {eval_obj.timestamp}")
+        # Only load and render one page of evaluations (newest first)
+        num_pages = math.ceil(total_evals / HISTORY_PAGE_SIZE)
+        page = st.number_input("Page", min_value=1, max_value=num_pages, value=1, step=1) if num_pages > 1 else 1
+        
+        offset = (page - 1) * HISTORY_PAGE_SIZE
+        
+        for idx, eval_obj in enumerate(store.page(session_id, offset, HISTORY_PAGE_SIZE)):
+            with st.expander(f"Evaluation #{total_evals - offset - idx} - {eval_obj.use_case.replace('_', ' ').title()} - Score: {eval_obj.ai_overall_score}/5.0"):
+                st.write(f"**Timestamp:** {eval_obj.timestamp_iso}")
                 st.write(f"**Context:** {eval_obj.context or 'None'}")
                 st.write(f"**Decision:** {eval_obj.ai_decision.replace('_', ' ').title()}")
                 
-                st.text_area("Content", eval_obj.content, height=100, disabled=True, key=f"content_{idx}")
+                st.text_area("Content", eval_obj.content, height=100, disabled=True, key=f"content_{eval_obj.id}")
                 
                 if eval_obj.human_overall_score:
                     col1, col2 = st.columns(2)
@@ -231,10 +369,9 @@ with tab2:
         
         # Export option
         if st.button("Export History as JSON"):
-            export_data = [e.to_dict() for e in st.session_state.evaluations]
             st.download_button(
                 label="Download JSON",
-                data=json.dumps(export_data, indent=2),
+                data=store.export_json(session_id),
                 file_name=f"evaluations_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
                 mime="application/json"
             )
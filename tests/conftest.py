@@ -0,0 +1,10 @@
+import pytest
+
+from utils.evaluator import ContentEvaluator
+
+
+@pytest.fixture
+def evaluator(monkeypatch):
+    """A ContentEvaluator that never reaches the API (the key is a placeholder)"""
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    return ContentEvaluator()
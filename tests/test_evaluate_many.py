@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+import pytest
+
+import utils.evaluator
+from utils.data_model import Evaluation, MARKETING_COPY_CRITERIA
+
+
+class FakeAsyncAnthropic:
+    """Stands in for AsyncAnthropic, answering based on the content in the prompt"""
+
+    def __init__(self, **kwargs):
+        self.messages = SimpleNamespace(create=self._create)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def _create(self, **kwargs):
+        prompt = kwargs["messages"][0]["content"]
+        if "api error" in prompt:
+            raise RuntimeError("simulated API error")
+        if "no tool call" in prompt:
+            return SimpleNamespace(content=[SimpleNamespace(type="text", text="Sorry")])
+
+        tool_input = {key: {"score": 4, "explanation": "Good"} for key in MARKETING_COPY_CRITERIA}
+        return SimpleNamespace(content=[SimpleNamespace(type="tool_use", input=tool_input)])
+
+
+def test_failed_items_keep_their_slot(evaluator, monkeypatch):
+    monkeypatch.setattr(utils.evaluator, "AsyncAnthropic", FakeAsyncAnthropic)
+    items = [
+        ("first ok", "marketing_copy", ""),
+        ("api error", "marketing_copy", ""),
+        ("no tool call", "marketing_copy", ""),
+        ("unknown use case", "not_a_use_case", ""),
+        ("last ok", "marketing_copy", ""),
+    ]
+
+    results = evaluator.evaluate_many(items, max_concurrency=2)
+
+    assert len(results) == len(items)
+    assert isinstance(results[0], Evaluation) and results[0].content == "first ok"
+    assert isinstance(results[1], RuntimeError)
+    assert isinstance(results[2], ValueError)
+    assert isinstance(results[3], ValueError)
+    assert isinstance(results[4], Evaluation) and results[4].content == "last ok"
+    assert results[4].ai_overall_score == pytest.approx(4.0)
+
+
+def test_evaluate_batch_failed_items_keep_their_slot(evaluator, monkeypatch):
+    def evaluate_content(content, use_case, context=""):
+        if content == "api error":
+            raise RuntimeError("simulated API error")
+        return content
+
+    monkeypatch.setattr(evaluator, "evaluate_content", evaluate_content)
+    items = [("first ok", "marketing_copy", ""), ("api error", "marketing_copy", ""), ("last ok", "marketing_copy", "")]
+
+    results = evaluator.evaluate_batch(items, max_workers=2)
+
+    assert results[0] == "first ok"
+    assert isinstance(results[1], RuntimeError)
+    assert results[2] == "last ok"
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from utils.data_model import MARKETING_COPY_CRITERIA
+
+
+def tool_input(criteria):
+    return json.dumps({
+        key: {"score": 4, "explanation": f"Explanation for {key}, with {{braces}} and \"quotes\""}
+        for key in criteria
+    })
+
+
+def chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 64, 10_000])
+def test_parses_every_criterion_across_chunk_boundaries(evaluator, size):
+    text = tool_input(MARKETING_COPY_CRITERIA)
+
+    scores = dict(evaluator._parse_claude_response(chunks(text, size), MARKETING_COPY_CRITERIA))
+
+    assert list(scores) == list(MARKETING_COPY_CRITERIA)
+    for key, score in scores.items():
+        assert score.score == 4.0
+        assert score.explanation == f'Explanation for {key}, with {{braces}} and "quotes"'
+        assert score.weight == MARKETING_COPY_CRITERIA[key]["weight"]
+
+
+def test_yields_each_criterion_once_its_object_is_complete(evaluator):
+    text = tool_input(MARKETING_COPY_CRITERIA)
+    first_key, second_key = list(MARKETING_COPY_CRITERIA)[:2]
+    first_end = text.index(f'"{second_key}"')
+    received = []
+
+    def stream():
+        yield text[:first_end]
+        # The first criterion must be yielded before the rest of the text arrives
+        received.append(list(parsed))
+        yield text[first_end:]
+
+    parsed = {}
+    for key, score in evaluator._parse_claude_response(stream(), MARKETING_COPY_CRITERIA):
+        parsed[key] = score
+
+    assert received == [[first_key]]
+    assert list(parsed) == list(MARKETING_COPY_CRITERIA)
+
+
+def test_ignores_unknown_keys(evaluator):
+    scores = json.loads(tool_input(MARKETING_COPY_CRITERIA))
+    text = json.dumps({"not_a_criterion": {"score": 1, "explanation": "x"}, **scores})
+
+    parsed = dict(evaluator._parse_claude_response(chunks(text, 5), MARKETING_COPY_CRITERIA))
+
+    assert list(parsed) == list(MARKETING_COPY_CRITERIA)
+
+
+def test_missing_criteria_raise_value_error(evaluator):
+    scores = json.loads(tool_input(MARKETING_COPY_CRITERIA))
+    missing = list(MARKETING_COPY_CRITERIA)[-1]
+    del scores[missing]
+
+    with pytest.raises(ValueError, match=missing):
+        list(evaluator._parse_claude_response(chunks(json.dumps(scores), 5), MARKETING_COPY_CRITERIA))
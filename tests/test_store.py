@@ -0,0 +1,104 @@
+import orjson
+import pytest
+
+from utils.data_model import Evaluation
+from utils.store import EvaluationStore
+
+
+def make_evaluation(id, timestamp, score=3.0, decision="human_review"):
+    return Evaluation(
+        id=id,
+        timestamp=timestamp,
+        use_case="marketing_copy",
+        content=f"content {id}",
+        context="",
+        ai_scores={},
+        ai_overall_score=score,
+        ai_decision=decision
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    return EvaluationStore(str(tmp_path / "evals.db"))
+
+
+def test_sessions_are_isolated(store):
+    store.save(make_evaluation("a1", 1), "session-a")
+    store.save(make_evaluation("b1", 2), "session-b")
+    store.flush()
+
+    assert store.count("session-a") == 1
+    assert [e.id for e in store.page("session-a", 0, 10)] == ["a1"]
+    assert [e["id"] for e in orjson.loads(store.export_json("session-b"))] == ["b1"]
+    assert store.count("session-c") == 0
+    assert store.average_score("session-c") == 0.0
+
+
+def test_saving_an_existing_id_replaces_it(store):
+    store.save(make_evaluation("e1", 1, score=2.0, decision="auto_fail"), "s")
+    store.flush()
+    store.save(make_evaluation("e1", 1, score=4.5, decision="auto_pass"), "s")
+    store.flush()
+
+    assert store.count("s") == 1
+    assert store.decision_counts("s") == {"auto_pass": 1}
+    assert store.average_score("s") == 4.5
+
+
+def test_page_is_newest_first(store):
+    for i in range(5):
+        store.save(make_evaluation(f"e{i}", i), "s")
+    store.flush()
+
+    assert [e.id for e in store.page("s", 0, 2)] == ["e4", "e3"]
+    assert [e.id for e in store.page("s", 2, 2)] == ["e2", "e1"]
+    assert [e.id for e in store.page("s", 4, 2)] == ["e0"]
+
+
+def test_export_json_is_oldest_first_and_round_trips(store):
+    evaluations = [make_evaluation(f"e{i}", 1_700_000_000_000_000_000 + i * 1000) for i in (2, 0, 1)]
+    for evaluation in evaluations:
+        store.save(evaluation, "s")
+    store.flush()
+
+    exported = orjson.loads(store.export_json("s"))
+
+    assert [e["id"] for e in exported] == ["e0", "e1", "e2"]
+    assert all(isinstance(e["timestamp"], str) for e in exported)
+    assert Evaluation.from_dict(exported[0]).timestamp == 1_700_000_000_000_000_000
+
+
+def test_reads_include_writes_not_yet_committed(store, monkeypatch):
+    for i in range(3):
+        store.save(make_evaluation(f"committed{i}", i * 2, score=2.0, decision="auto_fail"), "s")
+    store.flush()
+
+    # Keep the next saves from reaching the writer so they stay pending
+    monkeypatch.setattr(store._queue, "put", lambda row: None)
+    for i in range(2):
+        store.save(make_evaluation(f"pending{i}", i * 2 + 1, score=5.0, decision="auto_pass"), "s")
+    # A pending save of a committed id replaces it rather than adding a row
+    store.save(make_evaluation("committed0", 0, score=5.0, decision="auto_pass"), "s")
+
+    assert store.count("s") == 5
+    assert store.decision_counts("s") == {"auto_fail": 2, "auto_pass": 3}
+    assert store.average_score("s") == pytest.approx((2.0 * 2 + 5.0 * 3) / 5)
+    assert [e.id for e in store.page("s", 0, 3)] == ["committed2", "pending1", "committed1"]
+    assert [e.id for e in store.page("s", 3, 3)] == ["pending0", "committed0"]
+    assert [e["id"] for e in orjson.loads(store.export_json("s"))] == [
+        "committed0", "pending0", "committed1", "pending1", "committed2"
+    ]
+    assert store.count("other") == 0
+
+
+def test_failed_writes_are_reported_once(store):
+    store._write_conn.execute("DROP TABLE evals")
+    store.save(make_evaluation("e1", 1), "s")
+    store.save(make_evaluation("e2", 2), "s")
+    store.flush()
+
+    assert store.take_failed_writes("s") == 2
+    assert store.take_failed_writes("s") == 0
+    assert store.take_failed_writes("other") == 0
+    assert store._writer.is_alive()
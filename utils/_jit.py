@@ -0,0 +1,26 @@
+"""Optional Numba JIT compilation (Numba is a soft dependency)"""
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    njit = None
+    NUMBA_AVAILABLE = False
+
+
+def tjit(*args, **kwargs):
+    """
+    Compile a function with numba.njit when Numba is installed
+
+    Falls back to the plain Python function otherwise. Works both bare
+    (@tjit) and with njit options (@tjit(cache=True)).
+    """
+    if len(args) == 1 and callable(args[0]) and not kwargs:
+        return tjit()(args[0])
+
+    def decorator(func):
+        if not NUMBA_AVAILABLE:
+            return func
+        return njit(*args, **kwargs)(func)
+
+    return decorator
@@ -1,20 +1,27 @@
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from typing import Dict, List, Optional
 from datetime import datetime
 import json
+import numpy as np
 
-@dataclass
+from ._jit import tjit
+
+@dataclass(frozen=True, slots=True)
 class CriterionScore:
     """Individual criterion evaluation"""
     score: float  # 1-5
     explanation: str
     weight: float  # percentage weight for this criterion
+    
+    def to_dict(self):
+        """Convert to dictionary for JSON storage"""
+        return {name: getattr(self, name) for name in self.__slots__}
 
-@dataclass
+@dataclass(slots=True)
 class Evaluation:
     """Complete evaluation of a piece of content"""
     id: str  # unique identifier
-    timestamp: str  # ISO format datetime
+    timestamp: int  # nanoseconds since epoch (time.time_ns()); ISO string in to_dict()
     use_case: str  # "marketing_copy" or "bilingual_compliance"
     content: str  # the content being evaluated
     context: str  # additional context provided
@@ -30,13 +37,31 @@ class Evaluation:
     human_decision: Optional[str] = None
     human_feedback: Optional[str] = None
     
+    @property
+    def timestamp_iso(self) -> str:
+        """Timestamp as an ISO format datetime, formatted on demand"""
+        return datetime.fromtimestamp(self.timestamp / 1e9).isoformat()
+    
     def to_dict(self):
-        """Convert to dictionary for JSON storage"""
-        return asdict(self)
+        """Convert to dictionary for JSON storage (shallow, unlike dataclasses.asdict)"""
+        return {
+            **{name: getattr(self, name) for name in self.__slots__},
+            'timestamp': self.timestamp_iso,
+            'ai_scores': {k: v.to_dict() for k, v in self.ai_scores.items()},
+            'human_scores': (
+                {k: v.to_dict() for k, v in self.human_scores.items()}
+                if self.human_scores else self.human_scores
+            )
+        }
     
     @classmethod
     def from_dict(cls, data: dict):
         """Create from dictionary"""
+        # Serialized timestamps are ISO strings; store them as nanoseconds
+        if isinstance(data.get('timestamp'), str):
+            seconds = datetime.fromisoformat(data['timestamp']).timestamp()
+            data['timestamp'] = round(seconds * 1_000_000) * 1000
+        
         # Convert nested CriterionScore dicts back to objects
         if 'ai_scores' in data:
             data['ai_scores'] = {
@@ -108,15 +133,42 @@ BILINGUAL_COMPLIANCE_CRITERIA = {
     }
 }
 
+# Criterion keys and weights as arrays, in criteria order, for vectorized scoring
+MARKETING_COPY_KEYS = tuple(MARKETING_COPY_CRITERIA.keys())
+MARKETING_COPY_WEIGHTS = np.array([info["weight"] for info in MARKETING_COPY_CRITERIA.values()])
+
+BILINGUAL_COMPLIANCE_KEYS = tuple(BILINGUAL_COMPLIANCE_CRITERIA.keys())
+BILINGUAL_COMPLIANCE_WEIGHTS = np.array([info["weight"] for info in BILINGUAL_COMPLIANCE_CRITERIA.values()])
+
+CRITERIA_WEIGHTS = {
+    "marketing_copy": (MARKETING_COPY_KEYS, MARKETING_COPY_WEIGHTS),
+    "bilingual_compliance": (BILINGUAL_COMPLIANCE_KEYS, BILINGUAL_COMPLIANCE_WEIGHTS)
+}
+
+@tjit(cache=True)
+def _weighted_avg(scores, weights):
+    total_score = 0.0
+    total_weight = 0.0
+    for i in range(scores.shape[0]):
+        total_score += scores[i] * weights[i]
+        total_weight += weights[i]
+    return total_score / total_weight
+
+def weighted_average(scores: np.ndarray, weights: np.ndarray) -> float:
+    """Weighted average of criterion scores, rounded to 2 decimals"""
+    return round(float(_weighted_avg(scores, weights)), 2)
+
 # Decision thresholds
 AUTO_PASS_THRESHOLD = 4.0
 AUTO_FAIL_THRESHOLD = 2.5
 
 def get_decision(overall_score: float) -> str:
     """Determine auto-pass/fail/review based on score"""
+    # Plain Python on purpose: for a single comparison, the call into a
+    # compiled function costs more than it saves
     if overall_score >= AUTO_PASS_THRESHOLD:
         return "auto_pass"
     elif overall_score < AUTO_FAIL_THRESHOLD:
         return "auto_fail"
     else:
-        return "human_review"
\ No newline at end of file
+        return "human_review"
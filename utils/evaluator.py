@@ -1,9 +1,14 @@
 import os
-from anthropic import Anthropic
-from typing import Dict, List
+import asyncio
+import httpx
+import numpy as np
+from anthropic import Anthropic, AsyncAnthropic, DefaultAsyncHttpxClient, DefaultHttpxClient
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import json
-from datetime import datetime
-import uuid
+import re
+import secrets
+import time
 from dotenv import load_dotenv
 
 from .data_model import (
@@ -11,21 +16,78 @@ from .data_model import (
     CriterionScore,
     MARKETING_COPY_CRITERIA,
     BILINGUAL_COMPLIANCE_CRITERIA,
-    get_decision
+    CRITERIA_WEIGHTS,
+    get_decision,
+    weighted_average
 )
 
 # Load environment variables
 load_dotenv()
 
+# HTTP settings for the Anthropic clients, applied on top of the SDK's httpx defaults
+# (TCP keepalive, redirects). HTTP/2 multiplexes concurrent requests
+# over a single connection. The read timeout leaves room for batched prompts.
+_HTTP_CLIENT_OPTIONS = {
+    "http2": True,
+    "limits": httpx.Limits(max_keepalive_connections=32, max_connections=32),
+    "timeout": httpx.Timeout(120.0, connect=5.0)
+}
+
+# Name of the tool Claude calls to record its scores
+SCORES_TOOL_NAME = "record_scores"
+
+# Matches a `"criterion_key":` prefix inside the streamed tool input
+_CRITERION_KEY_PATTERN = re.compile(r'\s*,?\s*"(?P<key>[^"]+)"\s*:\s*')
+
 class ContentEvaluator:
     """Evaluates content using Claude as a judge"""
     
+    # Evaluation criteria for each supported use case
+    _CRITERIA_BY_USE_CASE = {
+        "marketing_copy": MARKETING_COPY_CRITERIA,
+        "bilingual_compliance": BILINGUAL_COMPLIANCE_CRITERIA
+    }
+    
+    # Maximum number of concurrent Claude API calls in evaluate_many and evaluate_batch
+    MAX_WORKERS = 8
+    
+    # Maximum number of contents scored in one prompt by evaluate_content_batch
+    MAX_CONTENTS_PER_PROMPT = 5
+    
+    # Output token budget: fixed overhead plus room for each criterion's score and explanation
+    MAX_TOKENS_BASE = 200
+    MAX_TOKENS_PER_CRITERION = 150
+    
     def __init__(self):
         api_key = os.getenv("ANTHROPIC_API_KEY")
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
-        self.client = Anthropic(api_key=api_key)
+        # Persistent HTTP/2 clients so concurrent calls share keep-alive connections
+        self.client = Anthropic(
+            api_key=api_key,
+            http_client=DefaultHttpxClient(**_HTTP_CLIENT_OPTIONS)
+        )
+        # For callers running their own event loop (see aevaluate_content)
+        self.aclient = AsyncAnthropic(
+            api_key=api_key,
+            http_client=DefaultAsyncHttpxClient(**_HTTP_CLIENT_OPTIONS)
+        )
+        self._api_key = api_key
         self.model = "claude-sonnet-4-20250514"
+        
+        # The instructions only depend on the use case, so build them once
+        self._prompt_templates = {}
+        self._batched_prompt_templates = {}
+        for use_case, criteria in self._CRITERIA_BY_USE_CASE.items():
+            self._prompt_templates[use_case] = self._build_instructions(use_case, criteria)
+            self._batched_prompt_templates[use_case] = self._build_batched_instructions(use_case, criteria)
+        
+        # Tool schemas that constrain Claude's output to the use case's criteria
+        self._tools = {}
+        self._batched_tools = {}
+        for use_case, criteria in self._CRITERIA_BY_USE_CASE.items():
+            self._tools[use_case] = self._build_scores_tool(criteria)
+            self._batched_tools[use_case] = self._build_batched_scores_tool(criteria)
     
     def evaluate_content(
         self,
@@ -44,35 +106,208 @@ class ContentEvaluator:
         Returns:
             Evaluation object with scores and decision
         """
+        ai_scores = dict(self.evaluate_content_stream(content, use_case, context))
+        return self.build_evaluation(content, use_case, context, ai_scores)
+    
+    def evaluate_batch(
+        self,
+        items: List[Tuple[str, str, str]],
+        max_workers: int = MAX_WORKERS
+    ) -> List[Union[Evaluation, Exception]]:
+        """
+        Evaluate several pieces of content concurrently
+        
+        Args:
+            items: (content, use_case, context) tuples
+            max_workers: Number of Claude API calls kept in flight at once
+        
+        Returns:
+            Evaluation objects in the same order as items, with the exception
+            in place of any item that failed so the other results are kept
+        """
+        def evaluate(item):
+            try:
+                return self.evaluate_content(*item)
+            except Exception as error:
+                return error
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(evaluate, items))
+    
+    def evaluate_content_batch(
+        self,
+        contents: List[str],
+        use_case: str,
+        contexts: Optional[List[str]] = None
+    ) -> List[Evaluation]:
+        """
+        Evaluate several short pieces of content with shared prompts
+        
+        Up to MAX_CONTENTS_PER_PROMPT contents are scored in a single Claude
+        call, so the instructions and criteria are only sent once per group.
+        
+        Args:
+            contents: The text contents to evaluate
+            use_case: Either "marketing_copy" or "bilingual_compliance"
+            contexts: Additional context per content, same length as contents
+                (defaults to none)
+        
+        Returns:
+            Evaluation objects in the same order as contents
+        """
+        criteria = self._CRITERIA_BY_USE_CASE.get(use_case)
+        if criteria is None:
+            raise ValueError(f"Unknown use case: {use_case}")
+        contexts = contexts if contexts is not None else [""] * len(contents)
+        if len(contexts) != len(contents):
+            raise ValueError(
+                f"Got {len(contexts)} contexts for {len(contents)} contents; pass one context per content"
+            )
+        
+        evaluations = []
+        for start in range(0, len(contents), self.MAX_CONTENTS_PER_PROMPT):
+            group = contents[start:start + self.MAX_CONTENTS_PER_PROMPT]
+            group_contexts = contexts[start:start + self.MAX_CONTENTS_PER_PROMPT]
+            
+            prompt = self._build_batched_prompt(group, group_contexts)
+            
+            response = self.client.messages.create(
+                model=self.model,
+                max_tokens=self._max_tokens(criteria, len(group)),
+                system=self._system_prompt(self._batched_prompt_templates[use_case]),
+                tools=[self._batched_tools[use_case]],
+                tool_choice={"type": "tool", "name": SCORES_TOOL_NAME},
+                messages=[{
+                    "role": "user",
+                    "content": prompt
+                }]
+            )
+            
+            tool_input = self._tool_input(response)
+            scores_by_id = {entry["content_id"]: entry for entry in tool_input["evaluations"]}
+            
+            for i, (content, context) in enumerate(zip(group, group_contexts)):
+                if i+1 not in scores_by_id:
+                    raise ValueError(f"Claude did not score content {i+1} of the batch")
+                ai_scores = self._to_criterion_scores(scores_by_id[i+1], criteria)
+                evaluations.append(self.build_evaluation(content, use_case, context, ai_scores))
+        
+        return evaluations
+    
+    def evaluate_content_stream(
+        self,
+        content: str,
+        use_case: str,
+        context: str = ""
+    ) -> Iterator[Tuple[str, CriterionScore]]:
+        """
+        Evaluate content using the Claude streaming API
+        
+        Yields (criterion_key, CriterionScore) pairs as soon as each criterion's
+        tool input object has been received, so the UI can render scores progressively.
+        Pass the collected scores to build_evaluation() to get the Evaluation.
+        """
         # Get criteria based on use case
-        criteria = self._get_criteria(use_case)
+        criteria = self._CRITERIA_BY_USE_CASE.get(use_case)
+        if criteria is None:
+            raise ValueError(f"Unknown use case: {use_case}")
         
-        # Build the evaluation prompt
-        prompt = self._build_evaluation_prompt(content, use_case, context, criteria)
+        # Stream Claude API response
+        with self.client.messages.stream(
+            **self._request_kwargs(content, use_case, context)
+        ) as stream:
+            # The tool input arrives as partial JSON deltas
+            json_stream = (event.partial_json for event in stream if event.type == "input_json")
+            yield from self._parse_claude_response(json_stream, criteria)
+    
+    async def aevaluate_content(
+        self,
+        content: str,
+        use_case: str,
+        context: str = "",
+        client: Optional[AsyncAnthropic] = None
+    ) -> Evaluation:
+        """
+        Evaluate content using the async Claude API
         
-        # Call Claude API
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=2000,
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }]
+        Args:
+            content: The text content to evaluate
+            use_case: Either "marketing_copy" or "bilingual_compliance"
+            context: Additional context (campaign type, product category, etc.)
+            client: Async client to use (defaults to self.aclient)
+        
+        Returns:
+            Evaluation object with scores and decision
+        """
+        criteria = self._CRITERIA_BY_USE_CASE.get(use_case)
+        if criteria is None:
+            raise ValueError(f"Unknown use case: {use_case}")
+        client = client or self.aclient
+        
+        response = await client.messages.create(
+            **self._request_kwargs(content, use_case, context)
         )
         
-        # Parse the response
-        ai_scores = self._parse_claude_response(response.content[0].text, criteria)
+        tool_input = self._tool_input(response)
+        ai_scores = self._to_criterion_scores(tool_input, criteria)
+        return self.build_evaluation(content, use_case, context, ai_scores)
+    
+    def evaluate_many(
+        self,
+        items: List[Tuple[str, str, str]],
+        max_concurrency: int = MAX_WORKERS
+    ) -> List[Union[Evaluation, Exception]]:
+        """
+        Evaluate several pieces of content concurrently on a single thread
         
+        Args:
+            items: (content, use_case, context) tuples
+            max_concurrency: Number of Claude API calls kept in flight at once
+        
+        Returns:
+            Evaluation objects in the same order as items, with the exception
+            in place of any item that failed so the other results are kept
+        """
+        return asyncio.run(self._evaluate_many(items, max_concurrency))
+    
+    async def _evaluate_many(
+        self,
+        items: List[Tuple[str, str, str]],
+        max_concurrency: int
+    ) -> List[Union[Evaluation, Exception]]:
+        """Gather evaluate_content calls, at most max_concurrency at a time"""
+        # httpx async connections are bound to the event loop that opened them,
+        # so each asyncio.run gets its own client instead of sharing self.aclient
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async with AsyncAnthropic(
+            api_key=self._api_key,
+            http_client=DefaultAsyncHttpxClient(**_HTTP_CLIENT_OPTIONS)
+        ) as client:
+            async def evaluate(item):
+                async with semaphore:
+                    return await self.aevaluate_content(*item, client=client)
+            
+            return await asyncio.gather(*(evaluate(item) for item in items), return_exceptions=True)
+    
+    def build_evaluation(
+        self,
+        content: str,
+        use_case: str,
+        context: str,
+        ai_scores: Dict[str, CriterionScore]
+    ) -> Evaluation:
+        """Create an Evaluation object from the parsed criterion scores"""
         # Calculate overall score (weighted average)
-        overall_score = self._calculate_overall_score(ai_scores, criteria)
+        overall_score = self._calculate_overall_score(ai_scores, use_case)
         
         # Determine decision
         decision = get_decision(overall_score)
         
         # Create Evaluation object
         evaluation = Evaluation(
-            id=str(uuid.uuid4()),
-            timestamp=datetime.now().isoformat(),
+            id=secrets.token_hex(8),
+            timestamp=time.time_ns(),
             use_case=use_case,
             content=content,
             context=context,
@@ -83,51 +318,38 @@ class ContentEvaluator:
         
         return evaluation
     
-    def _get_criteria(self, use_case: str) -> Dict:
-        """Get evaluation criteria for the use case"""
-        if use_case == "marketing_copy":
-            return MARKETING_COPY_CRITERIA
-        elif use_case == "bilingual_compliance":
-            return BILINGUAL_COMPLIANCE_CRITERIA
-        else:
-            raise ValueError(f"Unknown use case: {use_case}")
-    
-    def _build_evaluation_prompt(
-        self,
-        content: str,
-        use_case: str,
-        context: str,
-        criteria: Dict
-    ) -> str:
-        """Build the evaluation prompt for Claude"""
-        
+    def _describe_use_case(self, use_case: str) -> str:
+        """Describe the use case being evaluated for the prompt"""
         if use_case == "marketing_copy":
-            use_case_description = """
+            return """
 You are evaluating MULTILINGUAL MARKETING COPY that was created directly in the target language 
 (not translated from English). The goal is to assess whether this copy is culturally appropriate, 
 persuasive, and effective for the target audience.
 """
         else:  # bilingual_compliance
-            use_case_description = """
+            return """
 You are evaluating BILINGUAL PRODUCT DOCUMENTATION (user manuals, packaging, labels) to ensure 
 both languages are present and the translation quality meets regulatory and usability standards.
 """
-        
-        # Build criteria description
-        criteria_desc = "\n".join([
+    
+    def _describe_criteria(self, criteria: Dict) -> str:
+        """Build the numbered criteria description for the prompt"""
+        return "\n".join([
             f"{i+1}. **{info['name']}** (Weight: {int(info['weight']*100)}%): {info['description']}"
             for i, (key, info) in enumerate(criteria.items())
         ])
+    
+    def _build_instructions(self, use_case: str, criteria: Dict) -> str:
+        """Build the static evaluation instructions for a use case"""
+        
+        use_case_description = self._describe_use_case(use_case)
+        criteria_desc = self._describe_criteria(criteria)
         
-        prompt = f"""You are an expert content quality evaluator specializing in multilingual content assessment.
+        return f"""You are an expert content quality evaluator specializing in multilingual content assessment.
 
 {use_case_description}
 
-**CONTENT TO EVALUATE:**
-{content}
-
-**CONTEXT:**
-{context if context else "No additional context provided"}
+The content to evaluate and its context are provided in the user message.
 
 **EVALUATION CRITERIA:**
 {criteria_desc}
@@ -138,77 +360,210 @@ For each criterion above, provide:
 2. A brief explanation (2-3 sentences) justifying the score
 
 **OUTPUT FORMAT:**
-You must respond ONLY with valid JSON in exactly this format (no other text before or after):
-
-{{
-  "criterion_key_1": {{
-    "score": X,
-    "explanation": "Your explanation here"
-  }},
-  "criterion_key_2": {{
-    "score": X,
-    "explanation": "Your explanation here"
-  }},
-  ...
-}}
-
-The criterion keys must be exactly: {', '.join(criteria.keys())}
-
-Return ONLY the JSON object, no markdown formatting, no additional text.
+Record your scores by calling the record_scores tool, with one entry per criterion.
 """
-        return prompt
-    
-    def _parse_claude_response(self, response_text: str, criteria: Dict) -> Dict[str, CriterionScore]:
-        """Parse Claude's JSON response into CriterionScore objects"""
-        try:
-            # Remove any markdown code blocks if present
-            response_text = response_text.strip()
-            if response_text.startswith("```"):
-                # Remove ```json and ``` markers
-                lines = response_text.split("\n")
-                response_text = "\n".join(lines[1:-1])
-            
-            # Parse JSON
-            scores_dict = json.loads(response_text)
-            
-            # Convert to CriterionScore objects
-            ai_scores = {}
-            for key, info in criteria.items():
-                if key in scores_dict:
-                    ai_scores[key] = CriterionScore(
-                        score=float(scores_dict[key]["score"]),
-                        explanation=scores_dict[key]["explanation"],
-                        weight=info["weight"]
-                    )
-                else:
-                    # Fallback if criterion missing
-                    ai_scores[key] = CriterionScore(
-                        score=3.0,
-                        explanation="Score not provided by evaluator",
-                        weight=info["weight"]
-                    )
-            
-            return ai_scores
-            
-        except Exception as e:
-            print(f"Error parsing Claude response: {e}")
-            print(f"Response text: {response_text}")
-            # Return default scores on error
-            return {
-                key: CriterionScore(score=3.0, explanation="Error parsing response", weight=info["weight"])
-                for key, info in criteria.items()
+    
+    def _build_batched_instructions(self, use_case: str, criteria: Dict) -> str:
+        """Build the static instructions for scoring several pieces of content at once"""
+        
+        use_case_description = self._describe_use_case(use_case)
+        criteria_desc = self._describe_criteria(criteria)
+        
+        return f"""You are an expert content quality evaluator specializing in multilingual content assessment.
+
+{use_case_description}
+
+The user message contains several pieces of content in <content id="N"> tags. Each piece of content 
+is evaluated independently, together with the <context> that has the same id.
+
+**EVALUATION CRITERIA:**
+{criteria_desc}
+
+**INSTRUCTIONS:**
+For each piece of content and each criterion above, provide:
+1. A score from 1-5 (where 1 = Poor, 2 = Below Average, 3 = Average, 4 = Good, 5 = Excellent)
+2. A brief explanation (2-3 sentences) justifying the score
+
+**OUTPUT FORMAT:**
+Record your scores by calling the record_scores tool, with one entry per content. Set each 
+entry's content_id to the id from the user message.
+"""
+    
+    def _criteria_schema(self, criteria: Dict) -> Dict:
+        """JSON schema properties with a {score, explanation} object per criterion"""
+        return {
+            key: {
+                "type": "object",
+                "description": info["description"],
+                "properties": {
+                    "score": {"type": "number", "minimum": 1, "maximum": 5},
+                    "explanation": {"type": "string"}
+                },
+                "required": ["score", "explanation"]
             }
+            for key, info in criteria.items()
+        }
     
-    def _calculate_overall_score(self, ai_scores: Dict[str, CriterionScore], criteria: Dict) -> float:
-        """Calculate weighted average of all criterion scores"""
-        total_score = 0.0
-        total_weight = 0.0
+    def _build_scores_tool(self, criteria: Dict) -> Dict:
+        """Build the tool Claude calls to record one content's scores"""
+        return {
+            "name": SCORES_TOOL_NAME,
+            "description": "Record the score and explanation for each evaluation criterion.",
+            "input_schema": {
+                "type": "object",
+                "properties": self._criteria_schema(criteria),
+                "required": list(criteria.keys())
+            }
+        }
+    
+    def _build_batched_scores_tool(self, criteria: Dict) -> Dict:
+        """Build the tool Claude calls to record scores for several contents"""
+        return {
+            "name": SCORES_TOOL_NAME,
+            "description": "Record the score and explanation for each evaluation criterion, for every content.",
+            "input_schema": {
+                "type": "object",
+                "properties": {
+                    "evaluations": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "content_id": {"type": "integer"},
+                                **self._criteria_schema(criteria)
+                            },
+                            "required": ["content_id", *criteria.keys()]
+                        }
+                    }
+                },
+                "required": ["evaluations"]
+            }
+        }
+    
+    def _system_prompt(self, instructions: str) -> List[Dict]:
+        """Wrap static instructions as a system block marked for prompt caching"""
+        # The API only caches prefixes of at least 1024 tokens (Sonnet). Today's
+        # tools + instructions are roughly 700 tokens, so this is a no-op until the
+        # criteria text grows past that; check usage.cache_read_input_tokens.
+        return [{
+            "type": "text",
+            "text": instructions,
+            "cache_control": {"type": "ephemeral"}
+        }]
+    
+    def _build_evaluation_prompt(self, content: str, context: str) -> str:
+        """Build the per-call user message for Claude"""
+        return f"""**CONTENT TO EVALUATE:**
+{content}
+
+**CONTEXT:**
+{context if context else "No additional context provided"}
+"""
+    
+    def _build_batched_prompt(self, contents: List[str], contexts: List[str]) -> str:
+        """Build the per-call user message covering several pieces of content"""
+        return "\n\n".join(
+            f"""<content id="{i+1}">
+{content}
+</content>
+<context id="{i+1}">
+{context if context else "No additional context provided"}
+</context>"""
+            for i, (content, context) in enumerate(zip(contents, contexts))
+        )
+    
+    def _max_tokens(self, criteria: Dict, num_contents: int = 1) -> int:
+        """Output token limit sized to the number of criteria being scored"""
+        return self.MAX_TOKENS_BASE + self.MAX_TOKENS_PER_CRITERION * len(criteria) * num_contents
+    
+    def _request_kwargs(self, content: str, use_case: str, context: str) -> Dict:
+        """Build the messages API arguments for evaluating a single piece of content"""
+        return {
+            "model": self.model,
+            "max_tokens": self._max_tokens(self._CRITERIA_BY_USE_CASE[use_case]),
+            "system": self._system_prompt(self._prompt_templates[use_case]),
+            "tools": [self._tools[use_case]],
+            "tool_choice": {"type": "tool", "name": SCORES_TOOL_NAME},
+            "messages": [{
+                "role": "user",
+                "content": self._build_evaluation_prompt(content, context)
+            }]
+        }
+    
+    def _parse_claude_response(
+        self,
+        json_stream: Iterable[str],
+        criteria: Dict
+    ) -> Iterator[Tuple[str, CriterionScore]]:
+        """
+        Incrementally parse Claude's streamed tool input into CriterionScore objects
         
-        for key, criterion_score in ai_scores.items():
-            total_score += criterion_score.score * criterion_score.weight
-            total_weight += criterion_score.weight
+        Each criterion value is decoded with raw_decode as soon as its closing
+        brace arrives.
+        """
+        decoder = json.JSONDecoder()
+        response_text = ""
+        pos = None  # index just past the outer opening brace
+        parsed = set()
         
-        # Normalize to 1-5 scale
-        if total_weight > 0:
-            return round(total_score / total_weight, 2)
-        return 3.0  # Default if weights are invalid
\ No newline at end of file
+        for chunk in json_stream:
+            response_text += chunk
+            
+            if pos is None:
+                start = response_text.find("{")
+                if start == -1:
+                    continue
+                pos = start + 1
+            
+            # Decode every criterion object that is complete so far
+            while True:
+                match = _CRITERION_KEY_PATTERN.match(response_text, pos)
+                if not match:
+                    break
+                try:
+                    value, pos = decoder.raw_decode(response_text, match.end())
+                except json.JSONDecodeError:
+                    break  # object still incomplete, wait for more text
+                
+                key = match.group("key")
+                if key not in criteria or key in parsed:
+                    continue
+                parsed.add(key)
+                
+                yield key, self._to_criterion_score(value, criteria[key])
+        
+        missing = [key for key in criteria if key not in parsed]
+        if missing:
+            raise ValueError(f"Claude did not score: {', '.join(missing)}")
+    
+    def _tool_input(self, response) -> Dict:
+        """Get the record_scores tool input from a messages API response"""
+        tool_input = next((block.input for block in response.content if block.type == "tool_use"), None)
+        if tool_input is None:
+            raise ValueError(f"Claude did not call the {SCORES_TOOL_NAME} tool")
+        return tool_input
+    
+    def _to_criterion_score(self, value: Dict, info: Dict) -> CriterionScore:
+        """Convert one criterion's tool input into a CriterionScore"""
+        return CriterionScore(
+            score=float(value["score"]),
+            explanation=value["explanation"],
+            weight=info["weight"]
+        )
+    
+    def _to_criterion_scores(self, scores_dict: Dict, criteria: Dict) -> Dict[str, CriterionScore]:
+        """Convert a {criterion_key: {score, explanation}} tool input into CriterionScore objects"""
+        missing = [key for key in criteria if key not in scores_dict]
+        if missing:
+            raise ValueError(f"Claude did not score: {', '.join(missing)}")
+        
+        return {
+            key: self._to_criterion_score(scores_dict[key], info)
+            for key, info in criteria.items()
+        }
+    
+    def _calculate_overall_score(self, ai_scores: Dict[str, CriterionScore], use_case: str) -> float:
+        """Calculate weighted average of all criterion scores"""
+        keys, weights = CRITERIA_WEIGHTS[use_case]
+        scores = np.fromiter((ai_scores[k].score for k in keys), dtype=np.float64, count=len(keys))
+        return weighted_average(scores, weights)
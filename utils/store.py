@@ -0,0 +1,220 @@
+import heapq
+import logging
+import queue
+import sqlite3
+import threading
+from typing import Dict, List, Tuple
+
+import orjson
+
+from .data_model import Evaluation
+
+logger = logging.getLogger(__name__)
+
+# Positions of the columns in a row tuple (same order as the evals table)
+_ID, _SESSION_ID, _TIMESTAMP, _USE_CASE, _CONTENT, _AI_OVERALL_SCORE, _AI_DECISION, _JSON_BLOB = range(8)
+
+
+class EvaluationStore:
+    """
+    Persists evaluations to SQLite, writing on a background thread
+
+    Every row belongs to a session id and all reads are filtered by it, so
+    each user only sees their own history. Reads never wait for the writer:
+    rows a session has saved but that are not committed yet are merged into
+    its query results.
+    """
+
+    def __init__(self, path: str = "evals.db"):
+        # The writer thread owns the write connection; script threads share the
+        # read connection, which WAL mode lets run alongside an open write
+        self._write_conn = sqlite3.connect(path, check_same_thread=False)
+        self._read_conn = sqlite3.connect(path, check_same_thread=False)
+        self._read_lock = threading.Lock()
+        self._queue = queue.Queue()
+
+        # session_id -> {evaluation id: row} for rows queued but not yet committed,
+        # and session_id -> number of rows whose write failed
+        self._pending: Dict[str, Dict[str, Tuple]] = {}
+        self._failed_writes: Dict[str, int] = {}
+        self._pending_lock = threading.Lock()
+
+        self._write_conn.execute("PRAGMA journal_mode=WAL")
+        self._write_conn.execute("""
+            CREATE TABLE IF NOT EXISTS evals (
+                id TEXT PRIMARY KEY,
+                session_id TEXT,
+                timestamp INTEGER,
+                use_case TEXT,
+                content TEXT,
+                ai_overall_score REAL,
+                ai_decision TEXT,
+                json_blob BLOB
+            )
+        """)
+        self._write_conn.execute(
+            "CREATE INDEX IF NOT EXISTS evals_session_timestamp ON evals (session_id, timestamp)"
+        )
+        self._write_conn.execute(
+            "CREATE INDEX IF NOT EXISTS evals_session_ai_decision ON evals (session_id, ai_decision)"
+        )
+        self._write_conn.commit()
+
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def save(self, evaluation: Evaluation, session_id: str):
+        """Queue a session's evaluation to be inserted (or replaced, if its id exists)"""
+        row = (
+            evaluation.id,
+            session_id,
+            evaluation.timestamp,
+            evaluation.use_case,
+            evaluation.content,
+            evaluation.ai_overall_score,
+            evaluation.ai_decision,
+            orjson.dumps(evaluation.to_dict())
+        )
+        with self._pending_lock:
+            self._pending.setdefault(session_id, {})[evaluation.id] = row
+        self._queue.put(row)
+
+    def flush(self):
+        """Block until every queued evaluation has been written (reads don't need this)"""
+        self._queue.join()
+
+    def take_failed_writes(self, session_id: str) -> int:
+        """Number of a session's evaluations that failed to save since the last call"""
+        with self._pending_lock:
+            return self._failed_writes.pop(session_id, 0)
+
+    def count(self, session_id: str) -> int:
+        """Number of evaluations stored for a session"""
+        pending = self._pending_rows(session_id)
+        where, params = self._committed_filter(session_id, pending)
+        (committed,), = self._query(f"SELECT COUNT(*) FROM evals WHERE {where}", params)
+        return committed + len(pending)
+
+    def decision_counts(self, session_id: str) -> Dict[str, int]:
+        """Number of a session's evaluations per AI decision"""
+        pending = self._pending_rows(session_id)
+        where, params = self._committed_filter(session_id, pending)
+        counts = dict(self._query(
+            f"SELECT ai_decision, COUNT(*) FROM evals WHERE {where} GROUP BY ai_decision",
+            params
+        ))
+        for row in pending:
+            counts[row[_AI_DECISION]] = counts.get(row[_AI_DECISION], 0) + 1
+        return counts
+
+    def average_score(self, session_id: str) -> float:
+        """Mean AI overall score across a session's evaluations"""
+        pending = self._pending_rows(session_id)
+        where, params = self._committed_filter(session_id, pending)
+        (total, count), = self._query(
+            f"SELECT SUM(ai_overall_score), COUNT(*) FROM evals WHERE {where}",
+            params
+        )
+        total = (total or 0.0) + sum(row[_AI_OVERALL_SCORE] for row in pending)
+        count += len(pending)
+        return total / count if count else 0.0
+
+    def page(self, session_id: str, offset: int, limit: int) -> List[Evaluation]:
+        """Load one page of a session's evaluations, newest first"""
+        pending = self._pending_rows(session_id)
+        where, params = self._committed_filter(session_id, pending)
+
+        if pending:
+            # Pending rows can land anywhere in the ordering, so merge them with
+            # everything up to the end of the page and slice afterwards
+            committed = self._query(
+                f"SELECT timestamp, json_blob FROM evals WHERE {where} ORDER BY timestamp DESC LIMIT ?",
+                (*params, offset + limit)
+            )
+            uncommitted = sorted(
+                ((row[_TIMESTAMP], row[_JSON_BLOB]) for row in pending),
+                key=lambda row: row[0],
+                reverse=True
+            )
+            rows = list(heapq.merge(committed, uncommitted, key=lambda row: row[0], reverse=True))
+            rows = rows[offset:offset + limit]
+        else:
+            rows = self._query(
+                f"SELECT timestamp, json_blob FROM evals WHERE {where} ORDER BY timestamp DESC LIMIT ? OFFSET ?",
+                (*params, limit, offset)
+            )
+
+        return [Evaluation.from_dict(orjson.loads(json_blob)) for _, json_blob in rows]
+
+    def export_json(self, session_id: str) -> bytes:
+        """A session's evaluations as a JSON array, oldest first"""
+        pending = self._pending_rows(session_id)
+        where, params = self._committed_filter(session_id, pending)
+        committed = self._query(
+            f"SELECT timestamp, json_blob FROM evals WHERE {where} ORDER BY timestamp",
+            params
+        )
+        uncommitted = sorted((row[_TIMESTAMP], row[_JSON_BLOB]) for row in pending)
+        rows = heapq.merge(committed, uncommitted, key=lambda row: row[0])
+        return b"[" + b",".join(json_blob for _, json_blob in rows) + b"]"
+
+    def _pending_rows(self, session_id: str) -> List[Tuple]:
+        """Snapshot of a session's rows that are queued but not committed"""
+        with self._pending_lock:
+            return list(self._pending.get(session_id, {}).values())
+
+    def _committed_filter(self, session_id: str, pending: List[Tuple]) -> Tuple[str, Tuple]:
+        """
+        WHERE clause for a session's committed rows, excluding the pending ones
+
+        Excluding the pending ids keeps a row from being counted twice when the
+        writer commits it between the snapshot and the query.
+        """
+        if not pending:
+            return "session_id = ?", (session_id,)
+        placeholders = ", ".join("?" * len(pending))
+        return (
+            f"session_id = ? AND id NOT IN ({placeholders})",
+            (session_id, *(row[_ID] for row in pending))
+        )
+
+    def _query(self, sql: str, params: Tuple) -> List[Tuple]:
+        with self._read_lock:
+            return self._read_conn.execute(sql, params).fetchall()
+
+    def _write_loop(self):
+        """Drain the queue, committing whatever has accumulated in one transaction"""
+        while True:
+            rows = [self._queue.get()]
+            while True:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                # Commits on success, rolls back on error
+                with self._write_conn:
+                    self._write_conn.executemany(
+                        "INSERT OR REPLACE INTO evals VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        rows
+                    )
+                failed = False
+            except Exception:
+                # Keep the writer alive; failures are reported through take_failed_writes()
+                logger.exception("Error saving %d evaluations", len(rows))
+                failed = True
+
+            with self._pending_lock:
+                for row in rows:
+                    session_rows = self._pending.get(row[_SESSION_ID], {})
+                    # A newer save of the same id may still be queued; leave it pending
+                    if session_rows.get(row[_ID]) is row:
+                        del session_rows[row[_ID]]
+                        if not session_rows:
+                            del self._pending[row[_SESSION_ID]]
+                    if failed:
+                        self._failed_writes[row[_SESSION_ID]] = self._failed_writes.get(row[_SESSION_ID], 0) + 1
+
+            for _ in rows:
+                self._queue.task_done()